@@ -1,16 +1,122 @@
 #!/usr/bin/env python3
-"""Convert WebM recording to optimized GIF."""
+"""Convert WebM or Matroska recording to optimized GIF."""
 
 import argparse
+import functools
+import os
 import subprocess
 import sys
 import tempfile
 from pathlib import Path
 
+# Preferred hardware decoders, in order of preference
+HWACCEL_CANDIDATES = ("vaapi", "cuda")
+# Input codecs worth decoding on the GPU
+HWACCEL_CODECS = {"vp8", "vp9", "h264"}
+
+
+def hwaccel_device_works(name: str) -> bool:
+    """Check that ffmpeg can open a device for the given hardware decoder."""
+    try:
+        result = subprocess.run(
+            [
+                "ffmpeg", "-hide_banner", "-loglevel", "error",
+                "-init_hw_device", name,
+                "-f", "lavfi", "-i", "nullsrc=s=16x16",
+                "-frames:v", "1",
+                "-f", "null", "-",
+            ],
+            capture_output=True,
+        )
+    except OSError:
+        return False
+    return result.returncode == 0
+
+
+@functools.cache
+def detect_hwaccel() -> str | None:
+    """Return the first hardware decoder with a usable device, if any.
+
+    `ffmpeg -hwaccels` only lists the methods ffmpeg was built with, so
+    each listed candidate's device is also opened once.
+    """
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-hwaccels"],
+            capture_output=True,
+            text=True,
+        )
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+
+    available = {line.strip() for line in result.stdout.splitlines()[1:]}
+    for name in HWACCEL_CANDIDATES:
+        if name in available and hwaccel_device_works(name):
+            return name
+    return None
+
+
+def probe_video_stream(input_path: Path) -> tuple[str, str] | None:
+    """Return codec name and WxH resolution of the first video stream."""
+    result = subprocess.run(
+        [
+            "ffprobe", "-v", "error",
+            "-select_streams", "v:0",
+            "-show_entries", "stream=codec_name,width,height",
+            "-of", "csv=p=0",
+            str(input_path),
+        ],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        return None
+    fields = result.stdout.strip().split(",")
+    if len(fields) != 3:
+        return None
+    codec, width, height = fields
+    return codec, f"{width}x{height}"
+
+
+def probe_duration(input_path: Path) -> float | None:
+    """Return the container duration in seconds, or None if it is not recorded."""
+    result = subprocess.run(
+        [
+            "ffprobe", "-v", "error",
+            "-show_entries", "format=duration",
+            "-of", "csv=p=0",
+            str(input_path),
+        ],
+        capture_output=True,
+        text=True,
+    )
+    try:
+        return float(result.stdout.strip())
+    except ValueError:
+        return None
+
+
+def get_theme_name() -> str:
+    """Return the current GTK theme name, or "default" if unavailable."""
+    try:
+        result = subprocess.run(
+            ["gsettings", "get", "org.gnome.desktop.interface", "gtk-theme"],
+            capture_output=True,
+            text=True,
+        )
+    except OSError:
+        return "default"
+    theme = result.stdout.strip().strip("'")
+    if result.returncode != 0 or not theme:
+        return "default"
+    return theme
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Convert WebM to optimized GIF")
-    parser.add_argument("input", help="Input WebM file")
+    parser.add_argument("input", help="Input WebM or Matroska file")
     parser.add_argument("output", help="Output GIF file")
     parser.add_argument(
         "--fps",
@@ -36,6 +142,12 @@ def parse_args() -> argparse.Namespace:
         default=80,
         help="Gifsicle lossy compression level (0-200)",
     )
+    parser.add_argument(
+        "--shared-palette",
+        metavar="DIR",
+        help="Reuse palettes cached in DIR across recordings with the same "
+        "theme and resolution",
+    )
     return parser.parse_args()
 
 
@@ -49,6 +161,75 @@ def run_command(cmd: list[str], description: str) -> bool:
     return True
 
 
+def run_pipeline(producer: list[str], consumer: list[str], description: str) -> bool:
+    """Run producer piped into consumer and print status."""
+    print(f"  {description}...")
+    # The producer's stderr goes to a file, since a pipe that is only read
+    # after the consumer exits would block the producer once it fills up
+    with tempfile.TemporaryFile() as first_log:
+        first = subprocess.Popen(producer, stdout=subprocess.PIPE, stderr=first_log)
+        second = subprocess.Popen(
+            consumer,
+            stdin=first.stdout,
+            stderr=subprocess.PIPE,
+        )
+        # Let the producer receive SIGPIPE if the consumer exits early
+        first.stdout.close()
+
+        _, second_err = second.communicate()
+        first.wait()
+        first_log.seek(0)
+        first_err = first_log.read()
+
+    ok = True
+    for proc, err in ((first, first_err), (second, second_err)):
+        if proc.returncode != 0:
+            print(f"  Error: {err.decode(errors='replace')}", file=sys.stderr)
+            ok = False
+    return ok
+
+
+def shared_palette_path(palette_dir: Path, input_path: Path, colors: int) -> Path:
+    """Return the cached palette path for the input's theme and resolution."""
+    stream = probe_video_stream(input_path)
+    resolution = stream[1] if stream is not None else "unknown"
+    return palette_dir / f"{get_theme_name()}-{resolution}-{colors}.png"
+
+
+def generate_palette(
+    input_path: Path,
+    palette_path: Path,
+    colors: int,
+    sample: str = "fps=1,scale=320:-1",
+    stats_mode: str = "full",
+) -> bool:
+    """Build a palette from the frames kept by the sample filter chain."""
+    palette_path.parent.mkdir(parents=True, exist_ok=True)
+    # Write next to the target and rename, so an interrupted or concurrent
+    # run never leaves a truncated palette at palette_path
+    fd, tmp_name = tempfile.mkstemp(
+        dir=palette_path.parent, prefix=".palette-", suffix=".png"
+    )
+    os.close(fd)
+    tmp_path = Path(tmp_name)
+    try:
+        ok = run_command(
+            [
+                "ffmpeg", "-y",
+                "-i", str(input_path),
+                "-vf", f"{sample},palettegen=max_colors={colors}"
+                f":stats_mode={stats_mode}:reserve_transparent=0",
+                str(tmp_path),
+            ],
+            "Generating palette",
+        )
+        if ok:
+            os.replace(tmp_path, palette_path)
+        return ok
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
 def convert_webm_to_gif(
     input_path: Path,
     output_path: Path,
@@ -56,41 +237,81 @@ def convert_webm_to_gif(
     width: int,
     colors: int,
     lossy: int,
+    palette_path: Path | None = None,
 ) -> bool:
     """Convert WebM to optimized GIF using ffmpeg and gifsicle.
 
-    Uses simple conversion for compatibility with Duration: N/A videos.
+    Without palette_path, a palette is built from the scaled frames first,
+    so the encoding pass streams instead of buffering the whole input.
     """
+    hwaccel = detect_hwaccel()
+    if hwaccel is not None:
+        stream = probe_video_stream(input_path)
+        if stream is None or stream[0] not in HWACCEL_CODECS:
+            hwaccel = None
+
+    filter_threads = str(os.cpu_count() or 4)
+
+    # GNOME's WebM recordings report "Duration: N/A"; those keep the output
+    # frame rate conversion that is known to work with them.
+    rate_args: list[str] = []
+    if probe_duration(input_path) is not None:
+        # fps runs before scale so only the frames that are kept get resampled
+        scale_chain = f"fps={fps},scale={width}:-1:flags=lanczos"
+    else:
+        scale_chain = f"scale={width}:-1:flags=lanczos"
+        rate_args = ["-r", str(fps)]
+    paletteuse = "paletteuse=dither=bayer:bayer_scale=5:diff_mode=rectangle:new=0"
+
+    # Log errors only
+    ffmpeg_options = [
+        "ffmpeg", "-y",
+        "-hide_banner", "-loglevel", "error",
+        "-filter_threads", filter_threads,
+        "-filter_complex_threads", filter_threads,
+    ]
+
+    # Colors are already quantized by ffmpeg; only re-optimize LZW
+    gifsicle_cmd = [
+        "gifsicle",
+        "-O3",
+        f"--lossy={lossy}",
+        "--no-extensions",
+        "-o", str(output_path),
+    ]
+
     with tempfile.TemporaryDirectory() as tmpdir:
-        tmp = Path(tmpdir)
-        raw_gif_path = tmp / "raw.gif"
+        if palette_path is None:
+            palette_path = Path(tmpdir) / "palette.png"
+            # stats_mode=diff favors the changing regions (cursor, animations)
+            if not generate_palette(
+                input_path, palette_path, colors, sample=scale_chain, stats_mode="diff"
+            ):
+                return False
 
-        # Simple conversion without fps filter (works with Duration: N/A)
-        if not run_command(
-            [
-                "ffmpeg", "-y",
-                "-i", str(input_path),
-                "-vf", f"scale={width}:-1:flags=lanczos",
-                "-r", str(fps),
-                str(raw_gif_path),
-            ],
-            "Creating GIF",
-        ):
-            return False
-
-        # Optimize with gifsicle
-        gifsicle_cmd = [
-            "gifsicle",
-            "--optimize=3",
-            f"--lossy={lossy}",
-            "--colors", str(colors),
-            str(raw_gif_path),
-            "-o", str(output_path),
+        ffmpeg_io = [
+            "-threads", "0",
+            "-i", str(input_path),
+            "-i", str(palette_path),
+            "-filter_complex", f"[0:v]{scale_chain}[x];[x][1:v]{paletteuse}",
+            *rate_args,
+            "-f", "gif", "pipe:1",
         ]
-        if not run_command(gifsicle_cmd, "Optimizing GIF"):
-            return False
 
-    return True
+        if hwaccel is not None:
+            if run_pipeline(
+                [*ffmpeg_options, "-hwaccel", hwaccel, *ffmpeg_io],
+                gifsicle_cmd,
+                f"Creating and optimizing GIF ({hwaccel} decoding)",
+            ):
+                return True
+            print("  Hardware decoding failed, retrying in software")
+
+        return run_pipeline(
+            [*ffmpeg_options, *ffmpeg_io],
+            gifsicle_cmd,
+            "Creating and optimizing GIF",
+        )
 
 
 def main() -> None:
@@ -106,6 +327,15 @@ def main() -> None:
     print(f"Converting {input_path} to {output_path}")
     print(f"  Settings: {args.fps}fps, {args.width}px width, {args.colors} colors")
 
+    palette_path = None
+    if args.shared_palette:
+        palette_path = shared_palette_path(Path(args.shared_palette), input_path, args.colors)
+        if palette_path.exists():
+            print(f"  Using shared palette: {palette_path}")
+        elif not generate_palette(input_path, palette_path, args.colors):
+            print("Palette generation failed!", file=sys.stderr)
+            sys.exit(1)
+
     success = convert_webm_to_gif(
         input_path,
         output_path,
@@ -113,6 +343,7 @@ def main() -> None:
         args.width,
         args.colors,
         args.lossy,
+        palette_path,
     )
 
     if not success:
@@ -7,41 +7,59 @@ so D-Bus calls work correctly without "Sender has vanished" errors.
 """
 
 import argparse
-import importlib.util
+import importlib
 import json
 import socket
+import struct
 import sys
 import threading
 import time
 from pathlib import Path
+from types import ModuleType
 
 SCRIPT_DIR = Path(__file__).parent.resolve()
 SCENARIOS_DIR = SCRIPT_DIR / "scenarios"
 
 sys.path.insert(0, str(SCRIPT_DIR))
 
-from lib.screencast import Screencast
+from lib.screencast import Screencast, select_pipeline
 
 DEFAULT_PORT = 9999
+# Close connections that send no request for this long, in seconds
+IDLE_TIMEOUT = 300
 
+# Replies are framed as a 4-byte big-endian payload length plus JSON
+REPLY_HEADER = struct.Struct("!I")
 
-def load_scenario(name: str):
-    """Load scenario module by name."""
+# Loaded scenario modules keyed by name, with the mtime they were loaded at
+_SCENARIO_CACHE: dict[str, tuple[float, ModuleType]] = {}
+
+
+def load_scenario(name: str) -> ModuleType:
+    """Load scenario module by name.
+
+    Modules are cached and only re-executed when the file changes.
+    """
     scenario_path = SCENARIOS_DIR / f"{name}.py"
 
     if not scenario_path.exists():
         raise FileNotFoundError(f"Scenario not found: {scenario_path}")
 
-    spec = importlib.util.spec_from_file_location(name, scenario_path)
-    if spec is None or spec.loader is None:
-        raise ImportError(f"Cannot load scenario: {name}")
+    mtime = scenario_path.stat().st_mtime
+    cached = _SCENARIO_CACHE.get(name)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
 
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
+    module_name = f"scenarios.{name}"
+    if module_name in sys.modules:
+        module = importlib.reload(sys.modules[module_name])
+    else:
+        module = importlib.import_module(module_name)
 
     if not hasattr(module, "run"):
         raise AttributeError(f"Scenario {name} must have a 'run' function")
 
+    _SCENARIO_CACHE[name] = (mtime, module)
     return module
 
 
@@ -57,6 +75,11 @@ def handle_command(cmd: dict) -> dict:
         output_path = cmd.get("output", "/tmp/recording.webm")
         pre_delay = cmd.get("pre_delay", 1.0)
         post_delay = cmd.get("post_delay", 1.0)
+        options = {
+            "pipeline": select_pipeline(
+                cmd.get("lossless", False), cmd.get("hw_encode", False)
+            ),
+        }
 
         try:
             scenario = load_scenario(scenario_name)
@@ -65,7 +88,7 @@ def handle_command(cmd: dict) -> dict:
 
         screencast = Screencast()
 
-        if not screencast.start(output_path):
+        if not screencast.start(output_path, options):
             return {"status": "error", "message": "Failed to start recording"}
 
         try:
@@ -88,31 +111,57 @@ def handle_command(cmd: dict) -> dict:
         return {"status": "error", "message": f"Unknown action: {action}"}
 
 
+def handle_request(line: bytes) -> dict:
+    """Parse one JSON request line and return the result."""
+    try:
+        cmd = json.loads(line.decode("utf-8").strip())
+        return handle_command(cmd)
+    except json.JSONDecodeError as e:
+        return {"status": "error", "message": f"Invalid JSON: {e}"}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+
+def encode_reply(result: dict) -> bytes:
+    """Serialize a result as one length-prefixed reply frame."""
+    payload = json.dumps(result).encode("utf-8")
+    return REPLY_HEADER.pack(len(payload)) + payload
+
+
 def handle_client(conn: socket.socket, addr: tuple) -> None:
-    """Handle a client connection."""
+    """Handle a client connection.
+
+    Requests are newline-terminated, and a client may send several over
+    the same connection. Each gets one length-prefixed reply. Connections
+    idle for IDLE_TIMEOUT seconds are closed.
+    """
     print(f"Connection from {addr}")
+    conn.settimeout(IDLE_TIMEOUT)
 
     try:
-        data = b""
+        data = bytearray()
         while True:
-            chunk = conn.recv(4096)
+            chunk = conn.recv(65536)
             if not chunk:
                 break
-            data += chunk
-            if b"\n" in data:
-                break
-
-        if data:
-            try:
-                cmd = json.loads(data.decode("utf-8").strip())
-                result = handle_command(cmd)
-            except json.JSONDecodeError as e:
-                result = {"status": "error", "message": f"Invalid JSON: {e}"}
-            except Exception as e:
-                result = {"status": "error", "message": str(e)}
-
-            conn.sendall(json.dumps(result).encode("utf-8") + b"\n")
-
+            data.extend(chunk)
+
+            while (end := data.find(b"\n")) != -1:
+                line = bytes(data[:end])
+                del data[:end + 1]
+                if line.strip():
+                    result = handle_request(line)
+                    conn.sendall(encode_reply(result))
+
+        # Request sent without a trailing newline before closing
+        if data.strip():
+            result = handle_request(bytes(data))
+            conn.sendall(encode_reply(result))
+
+    except socket.timeout:
+        print(f"Connection from {addr} idle for {IDLE_TIMEOUT}s")
+    except OSError as e:
+        print(f"Connection from {addr} failed: {e}")
     finally:
         conn.close()
         print(f"Connection from {addr} closed")
@@ -131,6 +180,8 @@ def run_server(port: int) -> None:
     try:
         while True:
             conn, addr = server.accept()
+            # Replies are small; send them without waiting for Nagle
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
             thread = threading.Thread(target=handle_client, args=(conn, addr))
             thread.daemon = True
             thread.start()
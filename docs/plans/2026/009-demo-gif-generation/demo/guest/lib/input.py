@@ -9,27 +9,70 @@ import subprocess
 import time
 from typing import Any
 
+import numpy as np
+
+try:
+    from evdev import UInput
+    from evdev import ecodes as _ec
+
+    _BTN_MAP = {1: _ec.BTN_LEFT, 2: _ec.BTN_MIDDLE, 3: _ec.BTN_RIGHT}
+except ImportError:
+    UInput = None
+    _ec = None
+    _BTN_MAP = {}
+
 IS_WAYLAND = os.environ.get("XDG_SESSION_TYPE") == "wayland"
 
+# ydotool button codes
+_YDOTOOL_BTN = {1: "0x40", 2: "0x41", 3: "0x42"}
+
 _last_x: int = 0
 _last_y: int = 0
 _uinput_device = None
 
 
+def _smoothstep(t: np.ndarray) -> np.ndarray:
+    """Ease-in-out curve for natural-looking movement."""
+    return t * t * (3 - 2 * t)
+
+
+# Ease curves keyed by step count, precomputed for common values
+_EASE_CURVES: dict[int, np.ndarray] = {
+    n: _smoothstep(np.linspace(0.0, 1.0, n + 1)) for n in (10, 20, 30, 40)
+}
+
+
+def _ease_curve(steps: int) -> np.ndarray:
+    """Get the cached ease curve for the given number of steps."""
+    curve = _EASE_CURVES.get(steps)
+    if curve is None:
+        curve = _smoothstep(np.linspace(0.0, 1.0, steps + 1))
+        _EASE_CURVES[steps] = curve
+    return curve
+
+
+def _plan_move(total_dx: int, total_dy: int, steps: int) -> tuple[np.ndarray, np.ndarray]:
+    """Compute cumulative integer offsets for each step of an eased move."""
+    ease = _ease_curve(steps)
+    xs = np.rint(total_dx * ease).astype(np.int32)
+    ys = np.rint(total_dy * ease).astype(np.int32)
+    return xs, ys
+
+
 def _get_uinput_device():
     """Get or create the uinput device for mouse control."""
     global _uinput_device
     if _uinput_device is not None:
         return _uinput_device
+    if _ec is None:
+        return None
 
     try:
-        from evdev import UInput, ecodes
-
         # Create a virtual mouse with relative positioning (like a real mouse)
         # Relative movement works more reliably with Mutter than absolute
         cap = {
-            ecodes.EV_KEY: [ecodes.BTN_LEFT, ecodes.BTN_RIGHT, ecodes.BTN_MIDDLE],
-            ecodes.EV_REL: [ecodes.REL_X, ecodes.REL_Y],
+            _ec.EV_KEY: [_ec.BTN_LEFT, _ec.BTN_RIGHT, _ec.BTN_MIDDLE],
+            _ec.EV_REL: [_ec.REL_X, _ec.REL_Y],
         }
         _uinput_device = UInput(cap, name="demo-virtual-mouse")
         return _uinput_device
@@ -38,19 +81,18 @@ def _get_uinput_device():
         return None
 
 
-def _move_uinput_rel(dx: int, dy: int) -> bool:
-    """Move cursor using uinput relative positioning."""
+def _move_uinput_rel_batched(deltas: list[tuple[int, int]]) -> bool:
+    """Write several relative deltas followed by a single sync."""
     try:
-        from evdev import ecodes
-
         device = _get_uinput_device()
         if device is None:
             return False
 
-        if dx:
-            device.write(ecodes.EV_REL, ecodes.REL_X, dx)
-        if dy:
-            device.write(ecodes.EV_REL, ecodes.REL_Y, dy)
+        for dx, dy in deltas:
+            if dx:
+                device.write(_ec.EV_REL, _ec.REL_X, dx)
+            if dy:
+                device.write(_ec.EV_REL, _ec.REL_Y, dy)
         device.syn()
         return True
     except Exception as e:
@@ -61,19 +103,15 @@ def _move_uinput_rel(dx: int, dy: int) -> bool:
 def _click_uinput(button: int = 1) -> bool:
     """Click using uinput."""
     try:
-        from evdev import ecodes
-
         device = _get_uinput_device()
         if device is None:
             return False
 
-        btn_map = {1: ecodes.BTN_LEFT, 2: ecodes.BTN_MIDDLE, 3: ecodes.BTN_RIGHT}
-        btn = btn_map.get(button, ecodes.BTN_LEFT)
-
-        device.write(ecodes.EV_KEY, btn, 1)  # Press
+        btn = _BTN_MAP.get(button, _ec.BTN_LEFT)
+        device.write(_ec.EV_KEY, btn, 1)  # Press
         device.syn()
         time.sleep(0.05)
-        device.write(ecodes.EV_KEY, btn, 0)  # Release
+        device.write(_ec.EV_KEY, btn, 0)  # Release
         device.syn()
         return True
     except Exception as e:
@@ -127,39 +165,38 @@ def smooth_move(to_x: int, to_y: int, steps: int = 20, duration: float = 0.5) ->
     total_dx = to_x - from_x
     total_dy = to_y - from_y
 
-    # Track cumulative position for accurate final position
-    moved_x = 0
-    moved_y = 0
+    xs, ys = _plan_move(total_dx, total_dy, steps)
+    dxs = np.diff(xs, prepend=0)
+    dys = np.diff(ys, prepend=0)
 
     # Check if uinput is available
     uinput_available = _get_uinput_device() is not None
 
-    for i in range(steps + 1):
-        t = i / steps
-        # Use ease-in-out for more natural movement
-        t = t * t * (3 - 2 * t)
-
-        target_moved_x = int(total_dx * t)
-        target_moved_y = int(total_dy * t)
-
-        dx = target_moved_x - moved_x
-        dy = target_moved_y - moved_y
-
-        if uinput_available:
-            # Use uinput relative movement for Mutter compatibility
-            _move_uinput_rel(dx, dy)
-        else:
-            # Fall back to xdotool/ydotool with absolute positioning
-            x = from_x + target_moved_x
-            y = from_y + target_moved_y
+    if uinput_available:
+        # Use uinput relative movement for Mutter compatibility.
+        # Several steps share one sync; duration is spread across batches,
+        # paced against a deadline so sleep overshoot does not accumulate.
+        deltas = list(zip(dxs.tolist(), dys.tolist()))
+        batch_size = max(1, steps // 8)
+        batches = [deltas[i:i + batch_size] for i in range(0, len(deltas), batch_size)]
+        interval = duration / len(batches)
+        deadline = time.perf_counter()
+        for batch in batches:
+            _move_uinput_rel_batched(batch)
+            deadline += interval
+            remaining = deadline - time.perf_counter()
+            if remaining > 0:
+                time.sleep(remaining)
+    else:
+        # Fall back to xdotool/ydotool with absolute positioning
+        for moved_x, moved_y in zip(xs.tolist(), ys.tolist()):
+            x = from_x + moved_x
+            y = from_y + moved_y
             if IS_WAYLAND:
                 _mouse_tool("mousemove", "--absolute", str(x), str(y))
             else:
                 _mouse_tool("mousemove", str(x), str(y))
-
-        moved_x = target_moved_x
-        moved_y = target_moved_y
-        time.sleep(duration / steps)
+            time.sleep(duration / steps)
 
     _update_position(to_x, to_y)
 
@@ -189,8 +226,7 @@ def click(button: int = 1) -> None:
 
     # Fall back to xdotool/ydotool
     if IS_WAYLAND:
-        button_map = {1: "0x40", 2: "0x41", 3: "0x42"}  # ydotool button codes
-        _mouse_tool("click", button_map.get(button, "0x40"))
+        _mouse_tool("click", _YDOTOOL_BTN.get(button, "0x40"))
     else:
         _mouse_tool("click", str(button))
 
@@ -213,8 +249,7 @@ def double_click() -> None:
 def mouse_down(button: int = 1) -> None:
     """Press mouse button down."""
     if IS_WAYLAND:
-        button_map = {1: "0x40", 2: "0x41", 3: "0x42"}
-        _mouse_tool("mousedown", button_map.get(button, "0x40"))
+        _mouse_tool("mousedown", _YDOTOOL_BTN.get(button, "0x40"))
     else:
         _mouse_tool("mousedown", str(button))
 
@@ -222,8 +257,7 @@ def mouse_down(button: int = 1) -> None:
 def mouse_up(button: int = 1) -> None:
     """Release mouse button."""
     if IS_WAYLAND:
-        button_map = {1: "0x40", 2: "0x41", 3: "0x42"}
-        _mouse_tool("mouseup", button_map.get(button, "0x40"))
+        _mouse_tool("mouseup", _YDOTOOL_BTN.get(button, "0x40"))
     else:
         _mouse_tool("mouseup", str(button))
 
@@ -235,10 +269,13 @@ def type_text(text: str, delay: float = 0.05) -> None:
         text: Text to type
         delay: Delay between characters in seconds
     """
+    delay_ms = str(int(delay * 1000))
+    # "--" keeps text starting with "-" from being parsed as an option
     if IS_WAYLAND:
-        _mouse_tool("type", "--delay", str(int(delay * 1000)), text)
+        # ydotool's --delay is a one-off delay before typing starts
+        _mouse_tool("type", "--key-delay", delay_ms, "--", text)
     else:
-        _mouse_tool("type", "--delay", str(int(delay * 1000)), text)
+        _mouse_tool("type", "--delay", delay_ms, "--", text)
 
 
 def key_press(*keys: str) -> None:
@@ -1,5 +1,7 @@
 """GNOME Screencast D-Bus wrapper for screen recording."""
 
+import functools
+import subprocess
 from pathlib import Path
 
 from gi.repository import Gio, GLib
@@ -8,6 +10,59 @@ SCREENCAST_BUS_NAME = "org.gnome.Shell.Screencast"
 SCREENCAST_OBJECT_PATH = "/org/gnome/Shell/Screencast"
 SCREENCAST_INTERFACE = "org.gnome.Shell.Screencast"
 
+# Near-lossless VP8 so the GIF palette is not spent on compression noise.
+# Encoder speed and threading follow GNOME's own pipeline (realtime
+# cpu-used, %T = thread count chosen by gnome-shell) so a 2 vCPU VM keeps up.
+HIGH_QUALITY_PIPELINE = (
+    "videoconvert ! "
+    "vp8enc min_quantizer=0 max_quantizer=10 cpu-used=5 deadline=1 threads=%T ! "
+    "queue ! webmmux"
+)
+# Uncompressed frames in Matroska: large files, but no lossy round-trip
+LOSSLESS_PIPELINE = "videoconvert ! matroskamux"
+
+# Hardware H.264 encoders, in order of preference, with their pipeline
+HARDWARE_ENCODERS = (
+    ("vah264enc", "vah264enc rate-control=cbr bitrate=8000"),
+    ("vaapih264enc", "vaapih264enc rate-control=cbr bitrate=8000"),
+    ("nvh264enc", "nvh264enc rc-mode=cbr bitrate=8000"),
+)
+
+# Shared across Screencast instances so the proxy is only created once
+_shared_proxy: Gio.DBusProxy | None = None
+
+
+@functools.cache
+def detect_hardware_pipeline() -> str | None:
+    """Return an H.264 Matroska pipeline using a hardware encoder, if any."""
+    for element, encoder in HARDWARE_ENCODERS:
+        try:
+            result = subprocess.run(
+                ["gst-inspect-1.0", "--exists", element],
+                capture_output=True,
+            )
+        except OSError:
+            return None
+        if result.returncode == 0:
+            return f"videoconvert ! {encoder} ! h264parse ! matroskamux"
+    return None
+
+
+def select_pipeline(lossless: bool = False, hw_encode: bool = False) -> str:
+    """Choose the GStreamer pipeline for a recording.
+
+    Hardware encoding falls back to HIGH_QUALITY_PIPELINE when no supported
+    encoder is installed.
+    """
+    if lossless:
+        return LOSSLESS_PIPELINE
+    if hw_encode:
+        pipeline = detect_hardware_pipeline()
+        if pipeline is not None:
+            return pipeline
+        print("No hardware H.264 encoder found, using VP8")
+    return HIGH_QUALITY_PIPELINE
+
 
 class Screencast:
     """Wrapper for GNOME Shell Screencast D-Bus API.
@@ -19,21 +74,25 @@ class Screencast:
     def __init__(self) -> None:
         self._recording = False
         self._output_path: Path | None = None
-        self._proxy: Gio.DBusProxy | None = None
 
     def _get_proxy(self) -> Gio.DBusProxy:
-        """Get or create the D-Bus proxy."""
-        if self._proxy is None:
-            self._proxy = Gio.DBusProxy.new_for_bus_sync(
+        """Get or create the shared D-Bus proxy.
+
+        Only method calls are used, so properties and signals are not loaded.
+        """
+        global _shared_proxy
+        if _shared_proxy is None:
+            _shared_proxy = Gio.DBusProxy.new_for_bus_sync(
                 Gio.BusType.SESSION,
-                Gio.DBusProxyFlags.NONE,
+                Gio.DBusProxyFlags.DO_NOT_LOAD_PROPERTIES
+                | Gio.DBusProxyFlags.DO_NOT_CONNECT_SIGNALS,
                 None,
                 SCREENCAST_BUS_NAME,
                 SCREENCAST_OBJECT_PATH,
                 SCREENCAST_INTERFACE,
                 None,
             )
-        return self._proxy
+        return _shared_proxy
 
     @property
     def is_recording(self) -> bool:
@@ -43,8 +102,9 @@ class Screencast:
         """Start screen recording.
 
         Args:
-            output_path: Path for output WebM file
-            options: Optional options dict (e.g., {"framerate": 30})
+            output_path: Path for output video file
+            options: Optional options dict (e.g., {"framerate": 30}).
+                "pipeline" defaults to HIGH_QUALITY_PIPELINE.
 
         Returns:
             True if recording started successfully
@@ -58,21 +118,20 @@ class Screencast:
 
         # Build options variant
         builder = GLib.VariantBuilder.new(GLib.VariantType.new("a{sv}"))
-        if options:
-            for k, v in options.items():
-                if isinstance(v, bool):
-                    val = GLib.Variant.new_boolean(v)
-                elif isinstance(v, int):
-                    val = GLib.Variant.new_int32(v)
-                elif isinstance(v, str):
-                    val = GLib.Variant.new_string(v)
-                else:
-                    continue
-                entry = GLib.Variant.new_dict_entry(
-                    GLib.Variant.new_string(k),
-                    GLib.Variant.new_variant(val)
-                )
-                builder.add_value(entry)
+        for k, v in {"pipeline": HIGH_QUALITY_PIPELINE, **(options or {})}.items():
+            if isinstance(v, bool):
+                val = GLib.Variant.new_boolean(v)
+            elif isinstance(v, int):
+                val = GLib.Variant.new_int32(v)
+            elif isinstance(v, str):
+                val = GLib.Variant.new_string(v)
+            else:
+                continue
+            entry = GLib.Variant.new_dict_entry(
+                GLib.Variant.new_string(k),
+                GLib.Variant.new_variant(val)
+            )
+            builder.add_value(entry)
         opts = builder.end()
 
         try:
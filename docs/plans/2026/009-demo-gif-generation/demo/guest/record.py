@@ -2,7 +2,7 @@
 """Recording execution entry point for demo scenarios."""
 
 import argparse
-import importlib.util
+import importlib
 import sys
 import time
 from pathlib import Path
@@ -12,7 +12,7 @@ SCENARIOS_DIR = SCRIPT_DIR / "scenarios"
 
 sys.path.insert(0, str(SCRIPT_DIR))
 
-from lib.screencast import Screencast
+from lib.screencast import Screencast, select_pipeline
 
 
 def parse_args() -> argparse.Namespace:
@@ -25,7 +25,7 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--output",
         required=True,
-        help="Output WebM file path",
+        help="Output video file path (.webm, or .mkv with --lossless/--hw-encode)",
     )
     parser.add_argument(
         "--framerate",
@@ -33,6 +33,16 @@ def parse_args() -> argparse.Namespace:
         default=30,
         help="Recording framerate",
     )
+    parser.add_argument(
+        "--lossless",
+        action="store_true",
+        help="Record uncompressed Matroska instead of VP8 WebM",
+    )
+    parser.add_argument(
+        "--hw-encode",
+        action="store_true",
+        help="Record hardware-encoded H.264 Matroska when available",
+    )
     parser.add_argument(
         "--pre-delay",
         type=float,
@@ -55,12 +65,7 @@ def load_scenario(name: str):
     if not scenario_path.exists():
         raise FileNotFoundError(f"Scenario not found: {scenario_path}")
 
-    spec = importlib.util.spec_from_file_location(name, scenario_path)
-    if spec is None or spec.loader is None:
-        raise ImportError(f"Cannot load scenario: {name}")
-
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
+    module = importlib.import_module(f"scenarios.{name}")
 
     if not hasattr(module, "run"):
         raise AttributeError(f"Scenario {name} must have a 'run' function")
@@ -90,7 +95,10 @@ def main() -> None:
     screencast = Screencast()
 
     print(f"Starting recording: {args.output}")
-    options = {"framerate": args.framerate}
+    options = {
+        "framerate": args.framerate,
+        "pipeline": select_pipeline(args.lossless, args.hw_encode),
+    }
 
     if not screencast.start(args.output, options):
         print("Error: Failed to start recording", file=sys.stderr)
@@ -4,31 +4,103 @@
 import argparse
 import json
 import socket
+import struct
 import sys
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 DEFAULT_PORT = 9999
 DEFAULT_TIMEOUT = 300  # 5 minutes for long recordings
+MAX_REPLY_SIZE = 16 * 1024 * 1024
+REPLY_HEADER = struct.Struct("!I")
 
 
-def send_command(host: str, port: int, cmd: dict, timeout: int = DEFAULT_TIMEOUT) -> dict:
-    """Send command to daemon and return response."""
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    sock.settimeout(timeout)
+def encode_json(obj: Any) -> bytes:
+    """Serialize to compact JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
 
-    try:
-        sock.connect((host, port))
-        sock.sendall(json.dumps(cmd).encode("utf-8") + b"\n")
 
-        data = b""
-        while True:
-            chunk = sock.recv(4096)
-            if not chunk:
+def decode_json(data: bytes | bytearray) -> Any:
+    """Parse JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Wire frames for the constant commands, encoded once at import
+PING_FRAME = encode_json({"action": "ping"}) + b"\n"
+LIST_FRAME = encode_json({"action": "list_scenarios"}) + b"\n"
+
+
+def recv_exact(sock: socket.socket, size: int) -> bytearray:
+    """Read exactly size bytes, or fewer if the peer closes first."""
+    buf = bytearray(size)
+    received = 0
+    with memoryview(buf) as view:
+        while received < size:
+            n = sock.recv_into(view[received:])
+            if not n:
                 break
-            data += chunk
-            if b"\n" in data:
+            received += n
+    del buf[received:]
+    return buf
+
+
+def read_reply(sock: socket.socket) -> bytearray:
+    """Read one reply, or an empty buffer if the peer closed first.
+
+    Replies are a 4-byte big-endian length followed by the JSON payload.
+    Older daemons send newline-terminated JSON instead, recognised by its
+    leading "{".
+    """
+    header = recv_exact(sock, REPLY_HEADER.size)
+    if header.startswith(b"{"):
+        while not header.endswith(b"\n"):
+            if len(header) > MAX_REPLY_SIZE:
+                raise ValueError(f"Reply exceeds {MAX_REPLY_SIZE} bytes")
+            chunk = sock.recv(65536)
+            if not chunk:
                 break
+            header += chunk
+        return header
+
+    if not header:
+        return header
+    if len(header) < REPLY_HEADER.size:
+        raise ConnectionError("Connection closed mid-reply")
+
+    (size,) = REPLY_HEADER.unpack(header)
+    if size > MAX_REPLY_SIZE:
+        raise ValueError(f"Reply of {size} bytes exceeds {MAX_REPLY_SIZE}")
+    payload = recv_exact(sock, size)
+    if len(payload) < size:
+        raise ConnectionError("Connection closed mid-reply")
+    return payload
+
+
+def send_command(
+    host: str,
+    port: int,
+    cmd: dict | bytes,
+    timeout: int = DEFAULT_TIMEOUT,
+) -> dict:
+    """Send command to daemon and return response.
+
+    cmd is either a dict to encode or a pre-encoded frame such as PING_FRAME.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
 
-        return json.loads(data.decode("utf-8").strip())
+    try:
+        sock.connect((host, port))
+        sock.sendall(cmd if isinstance(cmd, bytes) else encode_json(cmd) + b"\n")
+        return decode_json(read_reply(sock))
 
     finally:
         sock.close()
@@ -68,13 +140,23 @@ def main() -> None:
     record_parser.add_argument("--output", default="/tmp/recording.webm", help="Output path")
     record_parser.add_argument("--pre-delay", type=float, default=1.0)
     record_parser.add_argument("--post-delay", type=float, default=1.0)
+    record_parser.add_argument(
+        "--lossless",
+        action="store_true",
+        help="Record uncompressed Matroska (use a .mkv output path)",
+    )
+    record_parser.add_argument(
+        "--hw-encode",
+        action="store_true",
+        help="Record hardware-encoded H.264 Matroska (use a .mkv output path)",
+    )
 
     args = parser.parse_args()
 
     if args.action == "ping":
-        cmd = {"action": "ping"}
+        cmd = PING_FRAME
     elif args.action == "list":
-        cmd = {"action": "list_scenarios"}
+        cmd = LIST_FRAME
     elif args.action == "record":
         cmd = {
             "action": "record",
@@ -82,6 +164,8 @@ def main() -> None:
             "output": args.output,
             "pre_delay": args.pre_delay,
             "post_delay": args.post_delay,
+            "lossless": args.lossless,
+            "hw_encode": args.hw_encode,
         }
     else:
         print(f"Unknown action: {args.action}", file=sys.stderr)
@@ -89,7 +173,10 @@ def main() -> None:
 
     try:
         result = send_command(args.host, args.port, cmd, args.timeout)
-        print(json.dumps(result, indent=2))
+        if orjson is not None:
+            print(orjson.dumps(result, option=orjson.OPT_INDENT_2).decode())
+        else:
+            print(json.dumps(result, indent=2))
 
         if result.get("status") != "ok":
             sys.exit(1)
@@ -2,7 +2,7 @@
 """Main orchestration script for demo GIF generation."""
 
 import argparse
-import json
+import functools
 import os
 import shutil
 import socket
@@ -12,6 +12,8 @@ import tempfile
 import time
 from pathlib import Path
 
+from daemon_client import PING_FRAME, decode_json, encode_json, read_reply
+
 SCRIPT_DIR = Path(__file__).parent.resolve()
 DEMO_DIR = SCRIPT_DIR.parent
 OUTPUT_DIR = DEMO_DIR / "output"
@@ -20,10 +22,15 @@ GUEST_DIR = DEMO_DIR / "guest"
 DEFAULT_SSH_PORT = 2222
 DEFAULT_DAEMON_PORT = 9999
 SSH_USER = "demo"
+SSH_TARGET = f"{SSH_USER}@localhost"
 SSH_OPTIONS = [
     "-o", "StrictHostKeyChecking=no",
     "-o", "UserKnownHostsFile=/dev/null",
     "-o", "ConnectTimeout=10",
+    # Share one SSH connection across ssh/scp/rsync calls
+    "-o", "ControlMaster=auto",
+    "-o", "ControlPath=~/.ssh/sutto-demo-%C",
+    "-o", "ControlPersist=600",
 ]
 
 
@@ -83,22 +90,57 @@ Examples:
     return parser.parse_args()
 
 
+@functools.cache
+def ssh_prefix(port: int) -> tuple[str, ...]:
+    """Return the ssh argv for the given port, without the destination."""
+    return ("ssh", *SSH_OPTIONS, "-p", str(port))
+
+
+@functools.cache
+def rsync_shell(port: int) -> str:
+    """Return the remote shell command passed to rsync -e."""
+    return " ".join(ssh_prefix(port))
+
+
 def ssh_run(port: int, command: str, check: bool = True) -> subprocess.CompletedProcess:
     """Run command via SSH."""
-    cmd = ["ssh", *SSH_OPTIONS, "-p", str(port), f"{SSH_USER}@localhost", command]
+    cmd = [*ssh_prefix(port), SSH_TARGET, command]
     return subprocess.run(cmd, capture_output=True, text=True, check=check)
 
 
-def scp_to_vm(port: int, local_path: Path, remote_path: str) -> None:
-    """Copy file to VM."""
-    cmd = ["scp", *SSH_OPTIONS, "-P", str(port), str(local_path), f"{SSH_USER}@localhost:{remote_path}"]
+def rsync_from_vm(port: int, remote_paths: list[str], local_dir: Path) -> None:
+    """Copy files from VM into local_dir with a single rsync."""
+    first, *rest = remote_paths
+    cmd = [
+        "rsync", "-a",
+        "-e", rsync_shell(port),
+        f"{SSH_TARGET}:{first}",
+        *(f":{path}" for path in rest),
+        f"{local_dir}/",
+    ]
     subprocess.run(cmd, check=True)
 
 
-def scp_from_vm(port: int, remote_path: str, local_path: Path) -> None:
-    """Copy file from VM."""
-    cmd = ["scp", *SSH_OPTIONS, "-P", str(port), f"{SSH_USER}@localhost:{remote_path}", str(local_path)]
-    subprocess.run(cmd, check=True)
+def open_ssh_master(port: int) -> bool:
+    """Start the background SSH master connection reused by later calls.
+
+    Returns True only if this call started it; a master that is already
+    running (e.g. from a concurrent run) is reused and left alone.
+    """
+    check = [*ssh_prefix(port), "-O", "check", SSH_TARGET]
+    if subprocess.run(check, capture_output=True, check=False).returncode == 0:
+        return False
+
+    # The ControlPath socket lives in ~/.ssh
+    (Path.home() / ".ssh").mkdir(mode=0o700, exist_ok=True)
+    cmd = [*ssh_prefix(port), "-M", "-N", "-f", SSH_TARGET]
+    return subprocess.run(cmd, check=False).returncode == 0
+
+
+def close_ssh_master(port: int) -> None:
+    """Stop the background SSH master connection."""
+    cmd = [*ssh_prefix(port), "-O", "exit", SSH_TARGET]
+    subprocess.run(cmd, capture_output=True, check=False)
 
 
 def sync_guest_scripts(port: int) -> None:
@@ -106,55 +148,96 @@ def sync_guest_scripts(port: int) -> None:
     print("Syncing guest scripts to VM...")
     cmd = [
         "rsync", "-avz", "--delete",
-        "-e", f"ssh {' '.join(SSH_OPTIONS)} -p {port}",
+        "-e", rsync_shell(port),
         f"{GUEST_DIR}/",
-        f"{SSH_USER}@localhost:~/demo/",
+        f"{SSH_TARGET}:~/demo/",
     ]
     subprocess.run(cmd, check=True)
 
 
-def send_daemon_command(port: int, cmd: dict, timeout: int = 300) -> dict:
-    """Send command to recording daemon."""
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    sock.settimeout(timeout)
+class DaemonClient:
+    """Persistent connection to the recording daemon.
 
-    try:
-        sock.connect(("localhost", port))
-        sock.sendall(json.dumps(cmd).encode("utf-8") + b"\n")
-
-        data = b""
-        while True:
-            chunk = sock.recv(4096)
-            if not chunk:
-                break
-            data += chunk
-            if b"\n" in data:
-                break
-
-        return json.loads(data.decode("utf-8").strip())
-    finally:
-        sock.close()
+    Commands are newline-terminated JSON and replies are length-prefixed
+    (see read_reply), sent over a single connection opened on first use.
+    """
 
+    def __init__(self, port: int) -> None:
+        self.port = port
+        self.sock: socket.socket | None = None
 
-def check_daemon(port: int) -> bool:
-    """Check if daemon is running."""
-    try:
-        result = send_daemon_command(port, {"action": "ping"}, timeout=5)
-        return result.get("status") == "ok"
-    except (socket.error, socket.timeout):
-        return False
+    def __enter__(self) -> "DaemonClient":
+        return self
 
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
 
-def get_available_scenarios() -> list[str]:
-    """List available scenario names."""
-    scenarios_dir = GUEST_DIR / "scenarios"
-    return [
-        f.stem for f in scenarios_dir.glob("*.py")
-        if not f.stem.startswith("_")
-    ]
+    def close(self) -> None:
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def _connect(self, timeout: float) -> socket.socket:
+        sock = socket.create_connection(("localhost", self.port), timeout=timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def send(self, cmd: dict | bytes, timeout: float = 300) -> dict:
+        """Send command and return the daemon's reply.
+
+        cmd is either a dict to encode or a pre-encoded frame such as PING_FRAME.
+        """
+        reused = self.sock is not None
+        if self.sock is None:
+            self.sock = self._connect(timeout)
+        self.sock.settimeout(timeout)
+
+        try:
+            self.sock.sendall(cmd if isinstance(cmd, bytes) else encode_json(cmd) + b"\n")
+            reply = read_reply(self.sock)
+        except (OSError, ValueError):
+            self.close()
+            raise
+
+        if not reply:
+            self.close()
+            # Daemons that close after each reply drop a reused connection
+            # before reading the command; retry once on a fresh one.
+            if reused:
+                return self.send(cmd, timeout)
+
+        return decode_json(reply)
+
+    def ping(self) -> bool:
+        """Check if daemon is running."""
+        try:
+            return self.send(PING_FRAME, timeout=5).get("status") == "ok"
+        except (socket.error, socket.timeout, ValueError):
+            return False
+
+    def record(self, scenario: str, output: str) -> dict:
+        """Record a scenario to the given path in the VM."""
+        return self.send({"action": "record", "scenario": scenario, "output": output})
 
 
-def run_scenario(args: argparse.Namespace, scenario: str, session: str) -> Path | None:
+@functools.cache
+def get_available_scenarios() -> list[str]:
+    """List available scenario names."""
+    with os.scandir(GUEST_DIR / "scenarios") as entries:
+        return [
+            entry.name[:-3] for entry in entries
+            if entry.name.endswith(".py")
+            and not entry.name.startswith("_")
+            and entry.is_file(follow_symlinks=False)
+        ]
+
+
+def run_scenario(
+    args: argparse.Namespace,
+    daemon: DaemonClient,
+    scenario: str,
+    session: str,
+) -> Path | None:
     """Run a single scenario and return path to generated GIF."""
     print(f"\n{'='*60}")
     print(f"Running scenario: {scenario} ({session})")
@@ -168,14 +251,7 @@ def run_scenario(args: argparse.Namespace, scenario: str, session: str) -> Path
 
     try:
         print("Starting recording via daemon...")
-        result = send_daemon_command(
-            args.daemon_port,
-            {
-                "action": "record",
-                "scenario": scenario,
-                "output": remote_webm,
-            },
-        )
+        result = daemon.record(scenario, remote_webm)
 
         if result.get("status") != "ok":
             print(f"Recording failed: {result.get('message')}", file=sys.stderr)
@@ -194,11 +270,8 @@ def run_scenario(args: argparse.Namespace, scenario: str, session: str) -> Path
 
         local_gif = output_subdir / f"{scenario}.gif"
         print(f"Copying GIF to {local_gif}...")
-        scp_from_vm(args.ssh_port, remote_gif, local_gif)
-
-        if args.keep_webm:
-            local_webm = output_subdir / f"{scenario}.webm"
-            scp_from_vm(args.ssh_port, remote_webm, local_webm)
+        remote_paths = [remote_gif, remote_webm] if args.keep_webm else [remote_gif]
+        rsync_from_vm(args.ssh_port, remote_paths, output_subdir)
 
         print(f"Generated: {local_gif}")
         return local_gif
@@ -245,20 +318,26 @@ def main() -> None:
         print("Error: GNOME is not ready", file=sys.stderr)
         sys.exit(1)
 
-    sync_guest_scripts(args.ssh_port)
-
-    print("Checking recording daemon...")
-    if not check_daemon(args.daemon_port):
-        print(f"Error: Recording daemon not running on port {args.daemon_port}", file=sys.stderr)
-        print("Start it in the VM with: python3 ~/demo/daemon.py", file=sys.stderr)
-        sys.exit(1)
-    print("Daemon is ready")
-
-    results = []
-    for session in sessions:
-        for scenario in scenarios:
-            gif_path = run_scenario(args, scenario, session)
-            results.append((scenario, session, gif_path))
+    started_master = open_ssh_master(args.ssh_port)
+    try:
+        sync_guest_scripts(args.ssh_port)
+
+        print("Checking recording daemon...")
+        with DaemonClient(args.daemon_port) as daemon:
+            if not daemon.ping():
+                print(f"Error: Recording daemon not running on port {args.daemon_port}", file=sys.stderr)
+                print("Start it in the VM with: python3 ~/demo/daemon.py", file=sys.stderr)
+                sys.exit(1)
+            print("Daemon is ready")
+
+            results = []
+            for session in sessions:
+                for scenario in scenarios:
+                    gif_path = run_scenario(args, daemon, scenario, session)
+                    results.append((scenario, session, gif_path))
+    finally:
+        if started_master:
+            close_ssh_master(args.ssh_port)
 
     print(f"\n{'='*60}")
     print("Summary")
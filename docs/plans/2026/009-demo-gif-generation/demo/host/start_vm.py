@@ -3,7 +3,6 @@
 
 import argparse
 import os
-import subprocess
 import sys
 from pathlib import Path
 
@@ -126,15 +125,15 @@ def main() -> None:
     env = os.environ.copy()
     env["SUTTO_DEMO_SESSION"] = args.session
 
-    print(f"\nRunning: {' '.join(cmd)}\n")
+    print(f"\nRunning: {' '.join(cmd)}\n", flush=True)
 
+    # Replace this process with QEMU: signals reach it directly and its
+    # exit status becomes ours.
     try:
-        subprocess.run(cmd, env=env, check=True)
-    except KeyboardInterrupt:
-        print("\nVM stopped by user")
-    except subprocess.CalledProcessError as e:
-        print(f"VM exited with error: {e.returncode}", file=sys.stderr)
-        sys.exit(e.returncode)
+        os.execvpe(cmd[0], cmd, env)
+    except OSError as e:
+        print(f"Failed to start {cmd[0]}: {e}", file=sys.stderr)
+        sys.exit(1)
 
 
 if __name__ == "__main__":
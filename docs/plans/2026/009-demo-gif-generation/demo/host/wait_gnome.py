@@ -2,13 +2,65 @@
 """Wait for GNOME Shell to be ready in the VM."""
 
 import argparse
+import functools
+import shlex
+import socket
 import subprocess
 import sys
 import time
+from collections.abc import Iterator
 
 DEFAULT_SSH_PORT = 2222
 DEFAULT_TIMEOUT = 300
-POLL_INTERVAL = 5
+POLL_INTERVAL = 5  # Upper bound for the backoff below
+INITIAL_POLL_INTERVAL = 0.2
+POLL_BACKOFF = 1.5
+PROBE_INTERVAL = 0.5
+SCREENCAST_TIMEOUT = 60
+
+# gnome-shell's "DBUS_SESSION_BUS_ADDRESS=..." environ entry, once resolved
+_dbus_addr: str | None = None
+
+# Polls GNOME Shell and the Screencast service inside the VM, so a single
+# SSH session covers both checks. Arguments: GNOME timeout, Screencast timeout.
+READINESS_SCRIPT = r"""
+GNOME_TIMEOUT=$1
+SCREENCAST_TIMEOUT=$2
+
+end=$((SECONDS + GNOME_TIMEOUT))
+VERSION=""
+while [ $SECONDS -lt $end ]; do
+    PID=$(pgrep -u "$USER" -x gnome-shell | head -n 1)
+    if [ -n "$PID" ]; then
+        DBUS_ADDR=$(grep -z DBUS_SESSION_BUS_ADDRESS /proc/$PID/environ 2>/dev/null | tr '\0' '\n')
+        if [ -n "$DBUS_ADDR" ]; then
+            export $DBUS_ADDR
+            VERSION=$(DISPLAY=:0 gdbus call --session \
+                --dest org.gnome.Shell \
+                --object-path /org/gnome/Shell \
+                --method org.freedesktop.DBus.Properties.Get \
+                org.gnome.Shell ShellVersion 2>/dev/null) && [ -n "$VERSION" ] && break
+        fi
+    fi
+    sleep 0.5
+done
+if [ -z "$VERSION" ]; then
+    exit 2
+fi
+echo "gnome=$VERSION"
+
+end=$((SECONDS + SCREENCAST_TIMEOUT))
+while [ $SECONDS -lt $end ]; do
+    if DISPLAY=:0 gdbus introspect --session \
+        --dest org.gnome.Shell.Screencast \
+        --object-path /org/gnome/Shell/Screencast 2>/dev/null | grep -q Screencast; then
+        echo "screencast=1"
+        exit 0
+    fi
+    sleep 0.5
+done
+exit 3
+"""
 
 
 def parse_args() -> argparse.Namespace:
@@ -33,31 +85,71 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def ssh_command(args: argparse.Namespace, command: str) -> subprocess.CompletedProcess:
-    """Execute command via SSH with proper options."""
-    ssh_cmd = [
+@functools.cache
+def ssh_prefix(port: int) -> tuple[str, ...]:
+    """Return the ssh argv for the given port, without the destination."""
+    return (
         "ssh",
         "-o", "StrictHostKeyChecking=no",
         "-o", "UserKnownHostsFile=/dev/null",
         "-o", "ConnectTimeout=5",
-        "-p", str(args.ssh_port),
-        f"{args.user}@localhost",
-        command,
-    ]
+        "-p", str(port),
+    )
+
+
+def ssh_command(
+    args: argparse.Namespace,
+    command: str,
+    input: str | None = None,
+    timeout: float = 30,
+) -> subprocess.CompletedProcess:
+    """Execute command via SSH with proper options."""
+    ssh_cmd = [*ssh_prefix(args.ssh_port), f"{args.user}@localhost", command]
     return subprocess.run(
         ssh_cmd,
+        input=input,
         capture_output=True,
         text=True,
-        timeout=30,
+        timeout=timeout,
     )
 
 
+def poll_delays() -> Iterator[float]:
+    """Yield exponentially growing poll delays, capped at POLL_INTERVAL."""
+    delay = INITIAL_POLL_INTERVAL
+    while True:
+        yield delay
+        delay = min(POLL_INTERVAL, delay * POLL_BACKOFF)
+
+
+def probe_ssh_banner(port: int, timeout: float = 1.0) -> bool:
+    """Check that an SSH server sends its banner on localhost:port.
+
+    QEMU's user-mode port forward accepts connections before the guest's
+    sshd is up, so a successful connect alone is not enough.
+    """
+    try:
+        with socket.create_connection(("localhost", port), timeout=timeout) as sock:
+            return sock.recv(256).startswith(b"SSH-")
+    except OSError:
+        return False
+
+
 def wait_for_ssh(args: argparse.Namespace, timeout: int) -> bool:
-    """Wait for SSH to become available."""
+    """Wait for SSH to become available.
+
+    Polls cheaply for the SSH banner, then runs a real command once to
+    confirm login works.
+    """
     print("Waiting for SSH...")
-    start_time = time.time()
+    deadline = time.monotonic() + timeout
+    delays = poll_delays()
+
+    while time.monotonic() < deadline:
+        if not probe_ssh_banner(args.ssh_port):
+            time.sleep(PROBE_INTERVAL)
+            continue
 
-    while time.time() - start_time < timeout:
         try:
             result = ssh_command(args, "echo ok")
             if result.returncode == 0:
@@ -65,37 +157,67 @@ def wait_for_ssh(args: argparse.Namespace, timeout: int) -> bool:
                 return True
         except (subprocess.TimeoutExpired, subprocess.SubprocessError):
             pass
-        time.sleep(POLL_INTERVAL)
+        time.sleep(next(delays))
 
     return False
 
 
-def get_dbus_session_command(inner_cmd: str) -> str:
-    """Wrap command with D-Bus session environment from gnome-shell."""
-    return (
-        "PID=$(pgrep -x gnome-shell) && "
-        "DBUS_ADDR=$(grep -z DBUS_SESSION_BUS_ADDRESS /proc/$PID/environ 2>/dev/null | tr '\\0' '\\n') && "
-        f"export $DBUS_ADDR && DISPLAY=:0 {inner_cmd}"
-    )
+def resolve_dbus_address(args: argparse.Namespace) -> str | None:
+    """Look up gnome-shell's DBUS_SESSION_BUS_ADDRESS entry, caching the first hit."""
+    global _dbus_addr
+    if _dbus_addr is None:
+        try:
+            result = ssh_command(
+                args,
+                "cat /proc/$(pgrep -u \"$USER\" -x gnome-shell | head -n 1)/environ 2>/dev/null | "
+                "tr '\\0' '\\n' | grep '^DBUS_SESSION_BUS_ADDRESS='",
+            )
+        except subprocess.SubprocessError:
+            return None
+        lines = result.stdout.split()
+        if result.returncode == 0 and lines:
+            _dbus_addr = lines[0]
+    return _dbus_addr
+
+
+def forget_dbus_address() -> None:
+    """Drop the cached address so the next poll looks it up again."""
+    global _dbus_addr
+    _dbus_addr = None
+
+
+def get_dbus_session_command(args: argparse.Namespace, inner_cmd: str) -> str | None:
+    """Wrap command with D-Bus session environment from gnome-shell.
+
+    Returns None while gnome-shell's session bus address is not yet known.
+    """
+    addr = resolve_dbus_address(args)
+    if addr is None:
+        return None
+    return f"env {shlex.quote(addr)} DISPLAY=:0 {inner_cmd}"
 
 
 def wait_for_gnome_shell(args: argparse.Namespace, timeout: int) -> bool:
     """Wait for GNOME Shell to be running and responsive."""
     print("Waiting for GNOME Shell...")
-    start_time = time.time()
+    inner_cmd = (
+        "gdbus call --session "
+        "--dest org.gnome.Shell "
+        "--object-path /org/gnome/Shell "
+        "--method org.freedesktop.DBus.Properties.Get "
+        "org.gnome.Shell ShellVersion"
+    )
+    deadline = time.monotonic() + timeout
+    delays = poll_delays()
+
+    while time.monotonic() < deadline:
+        command = get_dbus_session_command(args, inner_cmd)
+        if command is None:
+            time.sleep(next(delays))
+            continue
 
-    while time.time() - start_time < timeout:
         try:
-            result = ssh_command(
-                args,
-                get_dbus_session_command(
-                    "gdbus call --session "
-                    "--dest org.gnome.Shell "
-                    "--object-path /org/gnome/Shell "
-                    "--method org.freedesktop.DBus.Properties.Get "
-                    "org.gnome.Shell ShellVersion"
-                )
-            )
+            result = ssh_command(args, command)
             if result.returncode == 0 and result.stdout.strip():
                 version = result.stdout.strip()
                 print(f"GNOME Shell is ready: {version}")
@@ -103,7 +225,9 @@ def wait_for_gnome_shell(args: argparse.Namespace, timeout: int) -> bool:
         except (subprocess.TimeoutExpired, subprocess.SubprocessError):
             pass
 
-        time.sleep(POLL_INTERVAL)
+        # gnome-shell may have restarted with a new session bus
+        forget_dbus_address()
+        time.sleep(next(delays))
 
     return False
 
@@ -111,29 +235,72 @@ def wait_for_gnome_shell(args: argparse.Namespace, timeout: int) -> bool:
 def wait_for_screencast_service(args: argparse.Namespace, timeout: int) -> bool:
     """Wait for GNOME Screencast D-Bus service to be available."""
     print("Waiting for Screencast service...")
-    start_time = time.time()
+    inner_cmd = (
+        "gdbus introspect --session "
+        "--dest org.gnome.Shell.Screencast "
+        "--object-path /org/gnome/Shell/Screencast"
+    )
+    deadline = time.monotonic() + timeout
+    delays = poll_delays()
+
+    while time.monotonic() < deadline:
+        command = get_dbus_session_command(args, inner_cmd)
+        if command is None:
+            time.sleep(next(delays))
+            continue
 
-    while time.time() - start_time < timeout:
         try:
-            result = ssh_command(
-                args,
-                get_dbus_session_command(
-                    "gdbus introspect --session "
-                    "--dest org.gnome.Shell.Screencast "
-                    "--object-path /org/gnome/Shell/Screencast"
-                )
-            )
+            result = ssh_command(args, command)
             if result.returncode == 0 and "Screencast" in result.stdout:
                 print("Screencast service is ready")
                 return True
         except (subprocess.TimeoutExpired, subprocess.SubprocessError):
             pass
 
-        time.sleep(POLL_INTERVAL)
+        # gnome-shell may have restarted with a new session bus
+        forget_dbus_address()
+        time.sleep(next(delays))
 
     return False
 
 
+def wait_for_gnome_batched(
+    args: argparse.Namespace,
+    gnome_timeout: int,
+    screencast_timeout: int,
+) -> tuple[bool, bool] | None:
+    """Wait for GNOME Shell and the Screencast service in one SSH session.
+
+    Returns (gnome_ready, screencast_ready), or None if the SSH session
+    itself could not be run.
+    """
+    print("Waiting for GNOME Shell and Screencast service...")
+    try:
+        result = ssh_command(
+            args,
+            f"bash -s -- {gnome_timeout} {screencast_timeout}",
+            input=READINESS_SCRIPT,
+            timeout=gnome_timeout + screencast_timeout + 30,
+        )
+    except (subprocess.TimeoutExpired, subprocess.SubprocessError):
+        return None
+
+    # ssh exits with 255 when the connection itself fails
+    if result.returncode == 255:
+        return None
+
+    gnome_ready = False
+    screencast_ready = False
+    for line in result.stdout.splitlines():
+        if line.startswith("gnome="):
+            gnome_ready = True
+            print(f"GNOME Shell is ready: {line.removeprefix('gnome=')}")
+        elif line == "screencast=1":
+            screencast_ready = True
+            print("Screencast service is ready")
+    return gnome_ready, screencast_ready
+
+
 def main() -> None:
     args = parse_args()
 
@@ -144,11 +311,21 @@ def main() -> None:
         print("Error: SSH did not become available within timeout", file=sys.stderr)
         sys.exit(1)
 
-    if not wait_for_gnome_shell(args, gnome_timeout):
+    ready = wait_for_gnome_batched(args, gnome_timeout, SCREENCAST_TIMEOUT)
+    if ready is None:
+        # Fall back to polling each check over its own SSH connection
+        gnome_ready = wait_for_gnome_shell(args, gnome_timeout)
+        screencast_ready = gnome_ready and wait_for_screencast_service(
+            args, SCREENCAST_TIMEOUT
+        )
+    else:
+        gnome_ready, screencast_ready = ready
+
+    if not gnome_ready:
         print("Error: GNOME Shell did not start within timeout", file=sys.stderr)
         sys.exit(1)
 
-    if not wait_for_screencast_service(args, 60):
+    if not screencast_ready:
         print("Warning: Screencast service not detected, recording may fail", file=sys.stderr)
 
     print("\nGNOME environment is ready for recording!")
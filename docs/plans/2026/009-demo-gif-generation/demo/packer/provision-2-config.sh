@@ -12,6 +12,7 @@ apt-get install -y \
     python3-gi \
     python3-dogtail \
     python3-evdev \
+    python3-numpy \
     gnome-shell-extension-prefs \
     xdotool \
     ydotool \